@@ -3,15 +3,41 @@ import sys
 import json
 import time
 import logging
-import subprocess
+import logging.handlers
 import requests
 import threading
 import yaml
-import schedule
+
+# Use the libyaml C loader when PyYAML was built with it; it parses the same
+# YAML an order of magnitude faster than the pure-Python fallback.
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# Optional fast JSON codec for the API hot path: orjson encodes/decodes
+# several times faster than the stdlib module. Fall back transparently.
+# Both variants return UTF-8 bytes: request bodies must stay bytes all the
+# way to the socket, because a str body is latin-1-encoded further down the
+# requests stack and non-ASCII message text would be mangled or rejected.
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+    _json_loads = json.loads
 from dotenv import load_dotenv
 from datetime import datetime
 import socket
 import atexit
+import functools
+import hashlib
+import re
+import shutil
 import select
 import queue
 import errno
@@ -25,15 +51,69 @@ from mcp import MCPClient, MCPServer
 # --- Logging Configuration ---
 LOG_FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "log.txt")
 
-# Configure logging to write to both console and file
+# Configure logging to write to both console and file. The actual file/console
+# I/O runs on a background QueueListener thread, so logger calls from the API
+# chain and the MCP output-reader threads only enqueue a record instead of
+# blocking on a write() syscall.
+class BufferedFileHandler(logging.FileHandler):
+    """FileHandler that batches writes instead of flushing every record.
+
+    The stream is opened with a 64KB buffer and only flushed on ERROR and
+    above (so crashes stay visible in the log) or by the periodic flush
+    timer below, turning one write() syscall per log line into one per batch.
+    """
+    _FLUSH_INTERVAL = 1.0
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=65536, encoding=self.encoding)
+
+    def emit(self, record):
+        try:
+            msg = self.format(record)
+            stream = self.stream
+            if stream is None:
+                stream = self._open()
+                self.stream = stream
+            stream.write(msg + self.terminator)
+            if record.levelno >= logging.ERROR:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def start_flush_timer(self):
+        # One long-lived daemon thread, not a threading.Timer chain: each
+        # Timer is a fresh OS thread, so rescheduling every second would
+        # spawn ~86k threads a day just to call flush().
+        def _flush_periodically():
+            while True:
+                time.sleep(self._FLUSH_INTERVAL)
+                try:
+                    self.flush()
+                except ValueError:
+                    return  # Stream already closed; stop flushing.
+        threading.Thread(target=_flush_periodically, daemon=True).start()
+
+_log_formatter = logging.Formatter(
+    fmt='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+_log_file_handler = BufferedFileHandler(LOG_FILENAME, mode='w', encoding='utf-8')
+_log_file_handler.setFormatter(_log_formatter)
+_log_file_handler.start_flush_timer()
+atexit.register(_log_file_handler.flush)
+_log_stream_handler = logging.StreamHandler(sys.stdout)
+_log_stream_handler.setFormatter(_log_formatter)
+
+_log_queue = queue.Queue(-1)
+_log_listener = logging.handlers.QueueListener(
+    _log_queue, _log_file_handler, _log_stream_handler, respect_handler_level=True
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logging.basicConfig(
     level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[
-        logging.FileHandler(LOG_FILENAME, mode='w', encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
 
 # Create a logger instance
@@ -45,6 +125,7 @@ ENV_FILENAME = os.path.join(SCRIPT_DIR, "kindroid.env")
 CONFIG_FILENAME = os.path.join(SCRIPT_DIR, "config", "config.yaml")
 PROMPT_FILENAME = os.path.join(SCRIPT_DIR, "prompts", "initial_prompt.md")
 GEMINI_SYSTEM_PROMPT = os.path.join(SCRIPT_DIR, "prompts", "gemini_system.md")
+STATE_FILENAME = os.path.join(SCRIPT_DIR, "state.json")
 
 # Load API keys from .env file
 if not os.path.exists(ENV_FILENAME):
@@ -77,9 +158,59 @@ if not os.path.exists(CONFIG_FILENAME):
     logger.error("Please create it with your configuration settings.")
     sys.exit(1)
 
+# Bump when the shape of the cached config payload changes.
+_CONFIG_CACHE_SCHEMA = 1
+
+def load_config(filename):
+    """Load the YAML config, using a JSON sidecar cache when it is fresh.
+
+    JSON parsing is much faster than YAML, so after the first successful
+    parse we write 'config.yaml.cache.json' next to the config and load
+    that on later startups unless the YAML file has been modified since.
+    """
+    cache_path = filename + ".cache.json"
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(filename):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            # The version header invalidates caches written before a schema
+            # change; anything unexpected falls through to a fresh parse.
+            if isinstance(cached, dict) and cached.get('_schema') == _CONFIG_CACHE_SCHEMA:
+                return cached['data']
+    except (OSError, ValueError, KeyError):
+        pass  # Missing or stale cache; fall through to the YAML parse.
+
+    with open(filename, 'r') as f:
+        parsed = yaml.load(f, Loader=_YamlLoader)
+
+    # Refresh the cache atomically (write to a temp file, then rename) so a
+    # crash mid-write can never leave a truncated cache behind. A cache-write
+    # failure of any kind just means "no cache" — the YAML parse above is
+    # already the source of truth, so never let it escape as fatal.
+    tmp_path = cache_path + ".tmp"
+    try:
+        # Not every YAML value survives JSON: dates raise TypeError, and
+        # non-string mapping keys get stringified, which would hand back
+        # differently-typed keys on a cache hit. Only cache configs that
+        # round-trip unchanged.
+        payload = json.dumps({'_schema': _CONFIG_CACHE_SCHEMA, 'data': parsed})
+        if json.loads(payload)['data'] == parsed:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, cache_path)
+        else:
+            logger.warning(f"Warning: Config contains values JSON cannot round-trip; skipping cache '{cache_path}'.")
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Warning: Could not write config cache '{cache_path}': {e}")
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+    return parsed
+
 try:
-    with open(CONFIG_FILENAME, 'r') as file:
-        config = yaml.safe_load(file)
+    config = load_config(CONFIG_FILENAME)
 except Exception as e:
     logger.error(f"Error loading configuration file: {e}")
     sys.exit(1)
@@ -116,28 +247,112 @@ except (ValueError, TypeError):
     logger.warning(f"Warning: Invalid max_chars. Using default ({DEFAULT_MAX_CHARS}).")
     MAX_RESPONSE_CHARS = DEFAULT_MAX_CHARS
 
+# Anything past MAX_RESPONSE_CHARS gets sliced off before the final Kindroid
+# call anyway, so cap generation at the source too: at ~4 chars per token,
+# tokens beyond max_chars // 4 can only produce text we would discard.
+EFFECTIVE_MAX_TOKENS = min(GEMINI_MAX_OUTPUT_TOKENS, max(16, MAX_RESPONSE_CHARS // 4))
+
+# --- Get Unchanged-Prompt Skip Window (Minutes) ---
+# When > 0, a scheduled run is skipped if the prompt file is unchanged since
+# the last successful run and that run was less than this many minutes ago.
+# Disabled by default: the chain is normally expected to run every interval
+# even with a static prompt.
+DEFAULT_SKIP_UNCHANGED_MINUTES = 0
+try:
+    SKIP_UNCHANGED_MINUTES = config.get('scheduling', {}).get('skip_unchanged_minutes', DEFAULT_SKIP_UNCHANGED_MINUTES)
+    if SKIP_UNCHANGED_MINUTES < 0:
+        logger.warning(f"Warning: skip_unchanged_minutes must not be negative. Using default ({DEFAULT_SKIP_UNCHANGED_MINUTES}).")
+        SKIP_UNCHANGED_MINUTES = DEFAULT_SKIP_UNCHANGED_MINUTES
+except (ValueError, TypeError):
+    logger.warning(f"Warning: Invalid skip_unchanged_minutes. Using default ({DEFAULT_SKIP_UNCHANGED_MINUTES}).")
+    SKIP_UNCHANGED_MINUTES = DEFAULT_SKIP_UNCHANGED_MINUTES
+
 # --- API Config ---
 GEMINI_MODEL = "gemini-1.5-flash"
 KINDROID_BASE_URL = "https://api.kindroid.ai/v1"
 KINDROID_ENDPOINT = "/send-message"
 GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models"
 
+# Static request components, built once — the credentials and endpoints never
+# change for the lifetime of the process.
+KINDROID_URL = KINDROID_BASE_URL + KINDROID_ENDPOINT
+KINDROID_HEADERS = {
+    "Authorization": f"Bearer {KINDROID_API_KEY}",
+    "Content-Type": "application/json"
+}
+GEMINI_HEADERS = {
+    "Content-Type": "application/json"
+}
+GEMINI_URL = f"{GEMINI_BASE_URL}/{GEMINI_MODEL}:generateContent?key={GEMINI_API_KEY}"
+
+# The Kindroid payload shape is fixed, so pre-serialize everything except the
+# message: building a request body is then one escape pass over the message
+# plus two concatenations — no per-call dict construction or object walk.
+_KINDROID_PAYLOAD_PREFIX = _json_dumps({"ai_id": KINDROID_AI_ID})[:-1] + b',"message":'
+
+# Shared HTTP session so the TLS connections to Kindroid and Gemini are pooled
+# and kept alive across the three calls of a chain run (and across runs),
+# instead of paying a fresh TCP+TLS handshake per request. The retry policy
+# deliberately keeps urllib3's defaults for which methods may be retried:
+# every call here is a non-idempotent POST, and re-sending one because a
+# gateway returned a 5xx after the backend committed it would deliver the
+# same chat message twice. Only connection-level failures (where no request
+# reached the server) are retried with backoff.
+SESSION = requests.Session()
+SESSION.mount("https://", requests.adapters.HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=requests.adapters.Retry(
+        total=2,
+        backoff_factor=0.3
+    )
+))
+
+@functools.lru_cache(maxsize=1)
+def resolve_allowed_dirs():
+    """Resolve the configured MCP allowed directories once per process.
+
+    Snapshots os.getcwd() a single time, substitutes ${workspaceFolder},
+    absolutizes each path and creates the directories. Cached so repeated
+    server (re)starts don't redo the filesystem work.
+    """
+    server_config = config.get('mcp_servers', {}).get('filesystem', {})
+    workspace = os.getcwd()
+    resolved = []
+    for dir_path in server_config.get('allowed_directories', []):
+        abs_path = os.path.abspath(dir_path.replace("${workspaceFolder}", workspace))
+        resolved.append(abs_path)
+        os.makedirs(abs_path, exist_ok=True)
+    return tuple(resolved)
+
+# Resolve (and create) the directories once at import time so that server
+# (re)starts are pure cache hits with no filesystem walks.
+_ALLOWED_DIRS = resolve_allowed_dirs()
+
 def is_server_running(process):
-    """Check if the MCP server is running by checking if the process is alive."""
+    """Check if the MCP server process is alive.
+
+    The server speaks MCP over stdio rather than HTTP, so a poll() on the
+    child process is the cheapest liveness probe available — no request
+    machinery, no logging on the happy path.
+    """
     if process is None:
-        logger.warning("Server process is None")
         return False
-    
-    # Check if the process is still running
-    if process.poll() is not None:
-        logger.warning(f"Server process has terminated with exit code {process.poll()}")
+    exit_code = process.poll()
+    if exit_code is not None:
+        logger.warning(f"Server process has terminated with exit code {exit_code}")
         return False
-    
-    logger.info("Server process is running")
     return True
 
+@functools.lru_cache(maxsize=1)
 def find_npx():
-    """Find the NPX executable on the system"""
+    """Find the NPX executable on the system (result cached, including misses)"""
+    # PATH lookup first: cheap, and the only thing that works on Linux/macOS
+    # (npm installs the Windows shim as npx.cmd, which which() may miss)
+    which_result = shutil.which("npx") or shutil.which("npx.cmd")
+    if which_result:
+        return which_result
+
     # Common locations for Node.js installation on Windows
     possible_paths = [
         os.path.expanduser("~\\AppData\\Roaming\\npm\\npx.cmd"),
@@ -155,132 +370,23 @@ def find_npx():
     return None
 
 def start_mcp_server(config):
-    """Start the MCP filesystem server if it's not already running."""
-    server_config = config.get('mcp_servers', {}).get('filesystem', {})
-    
-    logger.info("Starting MCP filesystem server...")
-    
-    try:
-        # Find NPX executable
-        npx_path = find_npx()
-        if not npx_path:
-            logger.error("Could not find NPX executable. Please ensure Node.js is installed.")
-            return False
-            
-        logger.info(f"Found NPX at: {npx_path}")
-            
-        # Get all allowed directories from config
-        allowed_dirs = []
-        for dir_path in server_config.get('allowed_directories', []):
-            # Replace ${workspaceFolder} with actual workspace path
-            abs_path = os.path.abspath(dir_path.replace("${workspaceFolder}", os.getcwd()))
-            allowed_dirs.append(abs_path)
-            # Create directory if it doesn't exist
-            os.makedirs(abs_path, exist_ok=True)
-        
-        # Build NPX command
-        cmd = [
-            npx_path,
-            "-y",
-            "@modelcontextprotocol/server-filesystem"
-        ]
-        
-        # Add allowed directories
-        cmd.extend(allowed_dirs)
-        
-        # Log the command for debugging
-        logger.info(f"Running command: {' '.join(cmd)}")
-        
-        # Set up environment with UTF-8 encoding
-        env = os.environ.copy()
-        env['PYTHONIOENCODING'] = 'utf-8'
-        if os.name == 'nt':  # Windows
-            env['PYTHONLEGACYWINDOWSSTDIO'] = '0'
-        
-        # Start the server process with pipe communication
-        process = subprocess.Popen(
-            cmd,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,  # Use text mode consistently
-            bufsize=1,  # Line buffered
-            env=env,
-            cwd=os.getcwd()  # Explicitly set working directory
-        )
-        
-        # Function to read process output
-        def read_output(pipe, prefix):
-            while True:
-                try:
-                    line = pipe.readline()
-                    if not line and process.poll() is not None:
-                        break
-                    if line:
-                        line = line.strip()
-                        if line:
-                            logger.info(f"{prefix}: {line}")
-                except Exception as e:
-                    logger.error(f"Error reading {prefix}: {e}")
-                    if process.poll() is not None:
-                        break
-                    time.sleep(0.1)
-        
-        # Start output reading threads
-        stdout_thread = threading.Thread(target=read_output, args=(process.stdout, "NPX"))
-        stderr_thread = threading.Thread(target=read_output, args=(process.stderr, "NPX Error"))
-        stdout_thread.daemon = True
-        stderr_thread.daemon = True
-        stdout_thread.start()
-        stderr_thread.start()
-        
-        # Wait for NPX to start downloading and installing the package
-        logger.info("Waiting for NPX to initialize (15 seconds)...")
-        time.sleep(15)
-        
-        # Check if process is still running
-        if process.poll() is not None:
-            logger.error("NPX process terminated unexpectedly")
-            return False
-        
-        # Wait for the server to start (up to 60 seconds)
-        logger.info("Waiting for server to start (up to 60 seconds)...")
-        for i in range(60):
-            if is_server_running(process):
-                logger.info("MCP filesystem server started successfully.")
-                return True
-            if process.poll() is not None:
-                logger.error("NPX process terminated unexpectedly while waiting for server")
-                return False
-            logger.info(f"Waiting for server... ({i+1}/60)")
-            time.sleep(1)
-            
-        # If we get here, the server didn't start
-        logger.error("Failed to start MCP filesystem server: timeout after 60 seconds")
-        process.terminate()  # Kill the process
-        return False
-        
-    except Exception as e:
-        logger.error(f"Failed to start MCP filesystem server: {e}")
+    """Start the MCP filesystem server if it's not already running.
+
+    Thin compatibility wrapper: MCPManager owns the server process and all
+    spawn/readiness logic (see mcp/mcp_server.py), so there is no second
+    startup path duplicating directory resolution and process polling.
+    """
+    if mcp_manager is None:
+        logger.error("MCP Manager is not initialized; cannot start server.")
         return False
+    return mcp_manager.server.start()
 
 def stop_mcp_server():
     """Stop the MCP filesystem server."""
     try:
-        if mcp_manager and mcp_manager.server_process:
+        if mcp_manager is not None:
             logger.info("Stopping MCP filesystem server...")
-            try:
-                mcp_manager.server_process.terminate()
-                # Wait for the process to terminate
-                mcp_manager.server_process.wait(timeout=5)
-                logger.info("MCP filesystem server stopped.")
-            except subprocess.TimeoutExpired:
-                # Force kill if it doesn't terminate gracefully
-                logger.warning("MCP server didn't terminate gracefully, forcing kill...")
-                mcp_manager.server_process.kill()
-                logger.info("MCP filesystem server killed.")
-            except Exception as e:
-                logger.error(f"Error stopping MCP server: {e}")
+            mcp_manager.server.stop()
     except Exception as e:
         logger.error(f"Error stopping MCP filesystem server: {e}")
 
@@ -292,19 +398,9 @@ class MCPManager:
     def __init__(self, config):
         self.config = config
         
-        # Get server configuration
-        server_config = config.get('mcp_servers', {}).get('filesystem', {})
-        allowed_dirs = server_config.get('allowed_directories', [])
-        
-        # Process allowed directories
-        processed_dirs = []
-        for dir_path in allowed_dirs:
-            # Replace ${workspaceFolder} with actual workspace path
-            abs_path = os.path.abspath(dir_path.replace("${workspaceFolder}", os.getcwd()))
-            processed_dirs.append(abs_path)
-            # Create directory if it doesn't exist
-            os.makedirs(abs_path, exist_ok=True)
-            
+        # Get allowed directories (resolved and created once at import)
+        processed_dirs = list(_ALLOWED_DIRS)
+
         # If no directories configured, use current directory
         if not processed_dirs:
             processed_dirs = [os.getcwd()]
@@ -314,20 +410,24 @@ class MCPManager:
         # Create server instance with processed directories
         self.server = MCPServer(processed_dirs)
         
-        # Try to start the server with retries
+        # Try to start the server with exponential backoff between retries.
+        # MCPServer.start blocks until the server signals readiness, so a
+        # failure here is a real startup failure, not slow initialization —
+        # short initial retry delays converge much faster than a fixed sleep.
         max_retries = 3
+        retry_delay = 0.5
         for i in range(max_retries):
             try:
                 if self.server.start():
                     logger.info("MCP server started successfully")
                     return
                 logger.warning(f"Failed to start server, attempt {i+1} of {max_retries}")
-                time.sleep(5)  # Wait before retry
             except Exception as e:
                 logger.error(f"Error starting server (attempt {i+1}): {e}")
-                if i < max_retries - 1:  # Don't sleep on last attempt
-                    time.sleep(5)
-                    
+            if i < max_retries - 1:  # Don't sleep on last attempt
+                time.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 5)
+
         raise Exception("Failed to start MCP server after multiple attempts")
             
     def execute_tool(self, tool_name, params):
@@ -359,22 +459,57 @@ except Exception as e:
     logger.error(f"Failed to initialize MCP Manager: {e}")
     mcp_manager = None
 
+# Cache of prompt file contents keyed by path; each entry stores the file's
+# (mtime, size) so an edited prompt is picked up on the next read.
+_PROMPT_CACHE = {}
+
 def read_prompt_file(filename):
-    """Reads the content of the specified file."""
-    if not os.path.exists(filename):
-        logger.error(f"Error: Prompt file '{filename}' not found.")
-        return None
+    """Reads the content of the specified file, serving unchanged files from cache."""
     try:
+        # EAFP: one stat serves both the existence check and the cache key.
+        st = os.stat(filename)
+        cached = _PROMPT_CACHE.get(filename)
+        if cached is not None and cached[0] == (st.st_mtime_ns, st.st_size):
+            return cached[1]
+
         with open(filename, 'r', encoding='utf-8') as f:
             content = f.read()
         if not content.strip():
             logger.warning(f"Warning: Prompt file '{filename}' is empty.")
+        _PROMPT_CACHE[filename] = ((st.st_mtime_ns, st.st_size), content)
         return content
+    except FileNotFoundError:
+        logger.error(f"Error: Prompt file '{filename}' not found.")
+        return None
     except Exception as e:
         logger.error(f"Error reading file '{filename}': {e}")
         return None
 
-def send_message_to_kindroid(api_key, ai_id, message, call_description="Kindroid"):
+# The Gemini system prompt is static for the lifetime of the process: read it
+# once at startup (failing fast if missing) and pre-build the request part.
+_GEMINI_SYSTEM_PROMPT_TEXT = read_prompt_file(GEMINI_SYSTEM_PROMPT)
+if _GEMINI_SYSTEM_PROMPT_TEXT is None:
+    logger.error("Error: Could not read Gemini system prompt.")
+    sys.exit(1)
+_GEMINI_SYSTEM_PART = {"text": _GEMINI_SYSTEM_PROMPT_TEXT}
+
+# Reusable Gemini payload skeleton: only the user message text and the token
+# cap vary between calls. The chain runs single-threaded, so mutating the two
+# slots in place is safe and avoids rebuilding the nested dicts per request.
+_GEMINI_MESSAGE_PART = {"text": ""}
+_GEMINI_PAYLOAD = {
+    "contents": [{
+        "parts": [
+            _GEMINI_SYSTEM_PART,
+            _GEMINI_MESSAGE_PART
+        ]
+    }],
+    "generationConfig": {
+        "maxOutputTokens": None
+    }
+}
+
+def send_message_to_kindroid(message, call_description="Kindroid"):
     """Sends the message to the Kindroid API using MCP client and returns the response text."""
     if message is None:
         logger.warning(f"Warning: Attempting to send None message to {call_description}. Skipping.")
@@ -382,38 +517,32 @@ def send_message_to_kindroid(api_key, ai_id, message, call_description="Kindroid
     if not message.strip():
         logger.warning(f"Warning: Sending empty message to {call_description}.")
 
-    logger.info(f"\nSending message to {call_description} AI (ID: {ai_id})... (Length: {len(message)} chars)")
-    logger.info(f"Message Content: {message}")
+    logger.info(f"\nSending message to {call_description} AI (ID: {KINDROID_AI_ID})... (Length: {len(message)} chars)")
+    logger.debug("Message Content: %s", message)
 
     try:
-        url = KINDROID_BASE_URL + KINDROID_ENDPOINT
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "ai_id": ai_id,
-            "message": message
-        }
-
-        response = requests.post(url, headers=headers, json=payload, timeout=180)
+        body = _KINDROID_PAYLOAD_PREFIX + _json_dumps(message) + b'}'
+
+        response = SESSION.post(KINDROID_URL, headers=KINDROID_HEADERS, data=body, timeout=180)
 
         if response.status_code == 200:
             logger.info(f"{call_description} message sent successfully. Received response.")
-            raw_text = response.text
-            logger.info(f"Received Text: {raw_text}")
+            # Decode the bytes explicitly; response.text would first run
+            # charset detection even though the API always returns UTF-8.
+            raw_text = response.content.decode('utf-8', 'replace')
+            logger.debug("Received Text: %s", raw_text)
             return raw_text
         else:
             logger.error(f"\nError from {call_description} API:")
             logger.error(f"Status Code: {response.status_code}")
-            logger.error(f"Response Body: {response.text}")
+            logger.error(f"Response Body: {response.content[:2048].decode('utf-8', 'replace')}")
             return None
 
     except Exception as e:
         logger.error(f"\nAn unexpected error occurred during {call_description} request: {e}")
         return None
 
-def send_message_to_gemini(api_key, model, message, max_tokens):
+def send_message_to_gemini(message, max_tokens):
     """Sends the message to the Google Gemini API and returns the response text."""
     if message is None:
         logger.warning("Warning: Attempting to send None message to Gemini. Skipping.")
@@ -421,39 +550,21 @@ def send_message_to_gemini(api_key, model, message, max_tokens):
     if not message.strip():
         logger.warning("Warning: Sending empty message to Gemini.")
 
-    url = f"{GEMINI_BASE_URL}/{model}:generateContent?key={api_key}"
-    headers = {
-        "Content-Type": "application/json"
-    }
-    
-    # Read the system prompt
-    system_prompt = read_prompt_file(GEMINI_SYSTEM_PROMPT)
-    if not system_prompt:
-        logger.error("Error: Could not read Gemini system prompt.")
-        return None
+    _GEMINI_MESSAGE_PART["text"] = message
+    _GEMINI_PAYLOAD["generationConfig"]["maxOutputTokens"] = max_tokens
 
-    payload = {
-        "contents": [{
-            "parts": [
-                {"text": system_prompt},
-                {"text": message}
-            ]
-        }],
-        "generationConfig": {
-            "maxOutputTokens": max_tokens
-        }
-    }
-
-    logger.info(f"\nSending message to Google Gemini ({model}) with max_tokens={max_tokens}... (Length: {len(message)} chars)")
-    logger.info(f"Message Content: {message}")
+    logger.info(f"\nSending message to Google Gemini ({GEMINI_MODEL}) with max_tokens={max_tokens}... (Length: {len(message)} chars)")
+    logger.debug("Message Content: %s", message)
 
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=180)
+        response = SESSION.post(GEMINI_URL, headers=GEMINI_HEADERS, data=_json_dumps(_GEMINI_PAYLOAD), timeout=180)
 
         if response.status_code == 200:
             logger.info("Gemini message sent successfully. Received response.")
             try:
-                response_data = response.json()
+                # Parse the raw bytes directly; response.json() would first
+                # decode to str via charset detection.
+                response_data = _json_loads(response.content)
                 candidates = response_data.get('candidates', [])
                 if not candidates:
                     prompt_feedback = response_data.get('promptFeedback')
@@ -476,14 +587,14 @@ def send_message_to_gemini(api_key, model, message, max_tokens):
                         elif finish_reason == "MAX_TOKENS":
                             logger.info(f"Info: Gemini response may have been truncated by the model due to maxOutputTokens ({max_tokens}).")
 
-                        logger.info(f"Received Text: {generated_text}")
+                        logger.debug("Received Text: %s", generated_text)
                         return generated_text
 
                 logger.error("Error: Could not parse expected text from Gemini response.")
                 return None
-            except json.JSONDecodeError:
+            except ValueError:
                 logger.error(f"Error: Gemini response is not valid JSON.")
-                logger.error(f"Raw Gemini response: {response.text}")
+                logger.error(f"Raw Gemini response: {response.content[:2048].decode('utf-8', 'replace')}")
                 return None
             except Exception as e:
                 logger.error(f"Error parsing Gemini response: {e}")
@@ -492,10 +603,10 @@ def send_message_to_gemini(api_key, model, message, max_tokens):
             logger.error(f"\nError from Gemini API:")
             logger.error(f"Status Code: {response.status_code}")
             try:
-                error_details = response.json()
+                error_details = _json_loads(response.content)
                 logger.error(f"Response Body: {json.dumps(error_details, indent=2)}")
-            except json.JSONDecodeError:
-                logger.error(f"Response Body: {response.text}")
+            except ValueError:
+                logger.error(f"Response Body: {response.content[:2048].decode('utf-8', 'replace')}")
             return None
 
     except requests.exceptions.Timeout:
@@ -508,47 +619,69 @@ def send_message_to_gemini(api_key, model, message, max_tokens):
         logger.error(f"\nAn unexpected error occurred during Gemini request: {e}")
         return None
 
+# raw_decode delimits a JSON object in one forward pass and reports its end
+# offset itself, so extraction needs no find/rfind double scan and copes with
+# prose or code fences surrounding (or following) the object.
+_JSON_DECODER = json.JSONDecoder()
+_JSON_OBJECT_START_RE = re.compile(r'\{')
+
+def _extract_tool_call(response):
+    """Return the first JSON object in the response that has a "tool" key."""
+    for match in _JSON_OBJECT_START_RE.finditer(response):
+        try:
+            obj, _ = _JSON_DECODER.raw_decode(response, match.start())
+        except ValueError:
+            continue
+        if isinstance(obj, dict) and 'tool' in obj:
+            return obj
+    return None
+
 def process_gemini_response(response):
     """Process Gemini's response and execute any tool calls"""
     if not response:
         return None
-        
+
     try:
-        # First try to find a JSON block in the response
-        json_start = response.find('{')
-        json_end = response.rfind('}') + 1
-        
-        if json_start >= 0 and json_end > json_start:
-            # Extract the JSON string
-            json_str = response[json_start:json_end]
-            try:
-                tool_call = json.loads(json_str)
-                # Check if this is a valid tool call
-                if isinstance(tool_call, dict) and tool_call.get('tool') == 'write_file':
-                    # Convert to MCP filesystem format
-                    mcp_params = {
-                        'type': 'request',
-                        'tool': 'write_file',
-                        'path': tool_call.get('path'),
-                        'content': tool_call.get('content')
-                    }
-                    logger.info(f"Executing filesystem write: {tool_call.get('path')}")
-                    result = mcp_manager.execute_tool('write_file', mcp_params)
-                    
-                    if result is not None:
-                        return f"Operation completed successfully: File '{tool_call.get('path')}' was created."
-                    else:
-                        return "Operation failed. Please check the logs for details."
-            except json.JSONDecodeError:
-                logger.error("Error parsing tool call JSON")
-                return None
-        
+        # Look for a JSON tool-call block in the response
+        tool_call = _extract_tool_call(response)
+        if tool_call is not None and tool_call.get('tool') == 'write_file':
+            # Convert to MCP filesystem format
+            mcp_params = {
+                'type': 'request',
+                'tool': 'write_file',
+                'path': tool_call.get('path'),
+                'content': tool_call.get('content')
+            }
+            logger.info(f"Executing filesystem write: {tool_call.get('path')}")
+            result = mcp_manager.execute_tool('write_file', mcp_params)
+
+            if result is not None:
+                return f"Operation completed successfully: File '{tool_call.get('path')}' was created."
+            else:
+                return "Operation failed. Please check the logs for details."
+
         # If no tool call found or not properly formatted, return the response as is
         return response
     except Exception as e:
         logger.error(f"Error processing Gemini response: {e}")
         return None
 
+def _load_run_state():
+    """Load the persisted state of the last successful chain run."""
+    try:
+        with open(STATE_FILENAME, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_run_state(state):
+    """Persist the state of the last successful chain run."""
+    try:
+        with open(STATE_FILENAME, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+    except OSError as e:
+        logger.warning(f"Warning: Could not write state file '{STATE_FILENAME}': {e}")
+
 def run_api_chain():
     """Reads prompt, calls Kindroid, then Gemini, then Kindroid again."""
     logger.info(f"\n--- Running API Chain @ {time.strftime('%Y-%m-%d %H:%M:%S')} ---")
@@ -562,11 +695,19 @@ def run_api_chain():
     if not initial_prompt_message.strip():
         logger.warning("Warning: Prompt file is empty. Proceeding with empty message.")
 
+    # Optionally skip the whole chain when the prompt is unchanged since a
+    # recent successful run — saves three network round-trips and API quota.
+    prompt_sha1 = hashlib.sha1(initial_prompt_message.encode('utf-8')).hexdigest()
+    if SKIP_UNCHANGED_MINUTES > 0:
+        state = _load_run_state()
+        age = time.time() - state.get('last_run_ts', 0)
+        if state.get('prompt_sha1') == prompt_sha1 and age < SKIP_UNCHANGED_MINUTES * 60:
+            logger.info(f"Prompt unchanged since last successful run {age/60:.1f} minutes ago; skipping this run.")
+            return
+
     # 2. Send initial prompt to Kindroid
     logger.info("\nStep 2: Sending initial prompt to Kindroid...")
     kindroid_response_1 = send_message_to_kindroid(
-        KINDROID_API_KEY,
-        KINDROID_AI_ID,
         initial_prompt_message,
         call_description="Kindroid (Initial)"
     )
@@ -578,10 +719,8 @@ def run_api_chain():
     # 3. Send Kindroid's response to Gemini
     logger.info("\nStep 3: Sending Kindroid's response to Gemini...")
     gemini_response = send_message_to_gemini(
-        GEMINI_API_KEY,
-        GEMINI_MODEL,
         kindroid_response_1,
-        GEMINI_MAX_OUTPUT_TOKENS
+        EFFECTIVE_MAX_TOKENS
     )
 
     if gemini_response is None:
@@ -596,17 +735,21 @@ def run_api_chain():
         logger.error("Error: Failed to process Gemini's response. Skipping final Kindroid call.")
         return
 
-    # 5. Truncate response if necessary
+    if not processed_response.strip():
+        logger.info("Empty Gemini response, skipping final Kindroid call.")
+        return
+
+    # 5. Truncate if necessary and build the final message in one allocation
+    # (a full-range slice is free in CPython, so the common short case pays
+    # for a single f-string only)
     if len(processed_response) > MAX_RESPONSE_CHARS:
         logger.info(f"Truncating response from {len(processed_response)} to {MAX_RESPONSE_CHARS} characters")
-        processed_response = processed_response[:MAX_RESPONSE_CHARS]
+    final_message = f"[System Assistant] {processed_response[:MAX_RESPONSE_CHARS]}"
 
     # 6. Send processed response back to Kindroid
     logger.info("\nStep 5: Sending processed response back to Kindroid...")
     kindroid_response_2 = send_message_to_kindroid(
-        KINDROID_API_KEY,
-        KINDROID_AI_ID,
-        f"[System Assistant] {processed_response}",
+        final_message,
         call_description="Kindroid (Final)"
     )
 
@@ -614,6 +757,7 @@ def run_api_chain():
         logger.error("Error: Failed to get final response from Kindroid.")
     else:
         logger.info("\nStep 6: Received final response from Kindroid.")
+        _save_run_state({'prompt_sha1': prompt_sha1, 'last_run_ts': time.time()})
 
     logger.info(f"\n--- API Chain Run Finished @ {time.strftime('%Y-%m-%d %H:%M:%S')} ---")
 
@@ -625,16 +769,25 @@ if __name__ == "__main__":
     logger.info("Performing initial run...")
     run_api_chain()
 
-    # Schedule the job to run every X minutes
+    # Re-run the chain every X minutes against a monotonic deadline: a single
+    # periodic job needs no job registry, wakes only when due, and is immune
+    # to wall-clock jumps.
+    interval_seconds = RUN_INTERVAL_MINUTES * 60
+    next_run = time.monotonic() + interval_seconds
     logger.info(f"\nScheduling job to run every {RUN_INTERVAL_MINUTES} minutes.")
-    schedule.every(RUN_INTERVAL_MINUTES).minutes.do(run_api_chain)
 
     # Keep the script running to allow the scheduler to work
     logger.info("Starting scheduler loop. Press Ctrl+C to exit.")
     try:
         while True:
-            schedule.run_pending()
-            time.sleep(60)
+            # Sleep in bounded slices so Ctrl+C stays responsive on platforms
+            # where long sleeps swallow signals.
+            remaining = next_run - time.monotonic()
+            if remaining > 0:
+                time.sleep(min(remaining, 300))
+                continue
+            run_api_chain()
+            next_run += interval_seconds
     except KeyboardInterrupt:
         logger.info("\nScheduler stopped by user.")
         sys.exit(0)
@@ -1,15 +1,31 @@
+import io
 import json
 import logging
-import time
 import threading
 import os
+import shlex
 import sys
 import queue
 import subprocess
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from typing import Optional, Dict
 
 logger = logging.getLogger('kindroid')
 
+# Optional fast JSON codec: orjson is several times faster than the stdlib
+# module and returns bytes directly, which also skips the str -> bytes encode
+# on the stdin write path. Fall back transparently.
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+    _json_loads = json.loads
+
 class MCPClient:
     def __init__(self, server_cmd):
         """Initialize MCP client with server command"""
@@ -17,6 +33,9 @@ class MCPClient:
         self.process = None
         self.request_id = 0
         self._lock = threading.Lock()
+        # Responses carrying a request id resolve the matching Future in
+        # _pending; messages without an id (e.g. pong) fall back to the queue.
+        self._pending: Dict[str, Future] = {}
         self._response_queue = queue.Queue()
         self._output_thread = None
         self._error_thread = None
@@ -28,51 +47,71 @@ class MCPClient:
             
         # Skip debug messages
         if line.startswith('[debug]'):
-            logger.debug(f"Server debug: {line}")
+            logger.debug("Server debug: %s", line)
             return
             
         try:
-            data = json.loads(line)
+            data = _json_loads(line)
             if not isinstance(data, dict):
-                logger.warning(f"Received non-dict JSON: {data}")
+                logger.warning("Received non-dict JSON: %s", data)
                 return
                 
             msg_type = data.get('type')
-            if msg_type == 'error':
-                logger.error(f"Server error: {data.get('error')}")
-                self._response_queue.put(data)
-            elif msg_type == 'response':
-                logger.info(f"Server response: {data}")
-                self._response_queue.put(data)
+            if msg_type in ('error', 'response'):
+                if msg_type == 'error':
+                    logger.error(f"Server error: {data.get('error')}")
+                else:
+                    logger.info("Server response: %s", data)
+                request_id = data.get('id')
+                fut = self._pending.pop(request_id, None) if request_id else None
+                if fut is not None:
+                    fut.set_result(data)
+                else:
+                    self._response_queue.put(data)
             else:
                 logger.warning(f"Unknown message type: {msg_type}")
                 
-        except json.JSONDecodeError:
-            logger.debug(f"Non-JSON output: {line}")
+        except ValueError:
+            logger.debug("Non-JSON output: %s", line)
             
     def _monitor_output(self, stream, name):
-        """Monitor output stream and process lines."""
+        """Monitor output stream and process lines.
+
+        The raw pipe is wrapped in a TextIOWrapper so data is pulled in
+        large chunks and split into lines in C, instead of one read() and
+        one decode() per line.
+        """
+        wrapper = io.TextIOWrapper(stream, encoding='utf-8', newline='\n', errors='replace')
         try:
-            for line in iter(stream.readline, b''):
-                line = line.decode().strip()
+            for line in wrapper:
+                line = line.strip()
                 if line:
-                    logger.debug(f"{name} output: {line}")
+                    logger.debug("%s output: %s", name, line)
                     self._process_server_output(line)
         except Exception as e:
             logger.error(f"Error monitoring {name}: {e}")
         finally:
-            stream.close()
+            wrapper.close()
 
     def start(self):
         """Start the MCP server process."""
         try:
             logger.info(f"Starting server with command: {self.server_cmd}")
+            # Exec the server directly instead of via a shell: avoids forking
+            # an intermediate /bin/sh and lets signals/exit codes reach the
+            # actual server process. Non-POSIX splitting on Windows, where
+            # POSIX rules would eat the backslashes in paths like
+            # C:\Users\...\npx.cmd.
+            if isinstance(self.server_cmd, str):
+                cmd = shlex.split(self.server_cmd, posix=(os.name != 'nt'))
+            else:
+                cmd = self.server_cmd
             self.process = subprocess.Popen(
-                self.server_cmd,
+                cmd,
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                shell=True
+                bufsize=65536
             )
             
             # Start output monitoring threads
@@ -88,23 +127,19 @@ class MCPClient:
             )
             self._output_thread.start()
             self._error_thread.start()
-            
-            # Wait for server to indicate it's ready
-            start_time = time.time()
-            while time.time() - start_time < 30:
-                if self.process.poll() is not None:
-                    raise Exception(f"Server process terminated with code {self.process.poll()}")
-                    
-                # Test connection
-                result = self.execute_tool("test")
-                if result is not None:
-                    logger.info("Server started successfully")
-                    return True
-                    
-                time.sleep(1)
-                
+
+            # Issue a single test call instead of polling once per second:
+            # the Future in execute_tool unblocks the moment the server's
+            # first response arrives, so startup costs the actual cold-start
+            # latency rather than up to 30 one-second round trips.
+            if self.execute_tool("test") is not None:
+                logger.info("Server started successfully")
+                return True
+
+            if self.process.poll() is not None:
+                raise Exception(f"Server process terminated with code {self.process.poll()}")
             raise Exception("Timeout waiting for server to start")
-            
+
         except Exception as e:
             logger.error(f"Failed to start server: {e}")
             self.stop()
@@ -117,33 +152,93 @@ class MCPClient:
             return None
         
         try:
+            fut = Future()
             with self._lock:
                 self.request_id += 1
+                request_id = str(self.request_id)
                 request = {
                     'type': 'request',
-                    'id': str(self.request_id),
+                    'id': request_id,
                     'tool': tool_name,
                     'params': kwargs
                 }
-                request_str = json.dumps(request) + '\n'
-                self.process.stdin.write(request_str.encode())
+                self._pending[request_id] = fut
+                self.process.stdin.write(_json_dumps(request) + b'\n')
                 self.process.stdin.flush()
-            
-            # Wait for response with timeout
+
+            # Wait for the matching response; concurrent callers can have
+            # multiple requests in flight since dispatch is keyed by id.
             try:
-                response = self._response_queue.get(timeout=30)
+                response = fut.result(timeout=30)
                 if response.get('type') == 'error':
                     logger.error(f"Tool execution failed: {response.get('error')}")
                     return None
                 return response.get('result')
-            except queue.Empty:
+            except FutureTimeoutError:
+                self._pending.pop(request_id, None)
                 logger.error("Timeout waiting for tool response")
                 return None
-            
+
         except Exception as e:
             logger.error(f"Error executing {tool_name}: {e}")
             return None
 
+    def batch_execute(self, calls):
+        """Execute several tool calls with a single pipe write.
+
+        Args:
+            calls: list of (tool_name, params_dict) tuples
+
+        Returns:
+            list: one result (or None on failure) per call, in order
+
+        All requests are serialized into one buffer and written/flushed
+        once, then each response is awaited via its id-keyed Future, so N
+        calls cost one write syscall instead of N.
+        """
+        if not self.is_connected():
+            logger.error("Not connected to server")
+            return [None] * len(calls)
+
+        futures = []
+        try:
+            lines = []
+            with self._lock:
+                for tool_name, params in calls:
+                    self.request_id += 1
+                    request_id = str(self.request_id)
+                    fut = Future()
+                    self._pending[request_id] = fut
+                    futures.append((request_id, fut))
+                    lines.append(_json_dumps({
+                        'type': 'request',
+                        'id': request_id,
+                        'tool': tool_name,
+                        'params': params
+                    }) + b'\n')
+                self.process.stdin.write(b''.join(lines))
+                self.process.stdin.flush()
+        except Exception as e:
+            logger.error(f"Error sending batch: {e}")
+            for request_id, _ in futures:
+                self._pending.pop(request_id, None)
+            return [None] * len(calls)
+
+        results = []
+        for request_id, fut in futures:
+            try:
+                response = fut.result(timeout=30)
+                if response.get('type') == 'error':
+                    logger.error(f"Tool execution failed: {response.get('error')}")
+                    results.append(None)
+                else:
+                    results.append(response.get('result'))
+            except FutureTimeoutError:
+                self._pending.pop(request_id, None)
+                logger.error("Timeout waiting for tool response")
+                results.append(None)
+        return results
+
     def is_connected(self):
         """Check if the client is connected to the server."""
         return self.process is not None and self.process.poll() is None
@@ -151,12 +246,10 @@ class MCPClient:
     def stop(self):
         """Stop the MCP server process and clean up resources."""
         try:
-            # Clear response queue
-            while not self._response_queue.empty():
-                try:
-                    self._response_queue.get_nowait()
-                except queue.Empty:
-                    break
+            # Clear response queue in one shot instead of draining item by
+            # item (one lock acquisition, C-level deque clear)
+            with self._response_queue.mutex:
+                self._response_queue.queue.clear()
 
             if self.process:
                 # Send terminate signal
@@ -221,9 +314,8 @@ class MCPClient:
             raise ConnectionError("Server is not running")
             
         try:
-            # Convert request to JSON and send
-            request_json = json.dumps(request)
-            self.process.stdin.write(f"{request_json}\n".encode())
+            # Serialize straight to bytes; no intermediate str + encode pass
+            self.process.stdin.write(_json_dumps(request) + b'\n')
             self.process.stdin.flush()
             
             # Wait for response
@@ -2,100 +2,47 @@ import os
 import sys
 import json
 import time
+import functools
+import hashlib
 import logging
+import tempfile
+import selectors
 import subprocess
 import threading
+import itertools
 import queue
+import re
 import shutil
 from typing import Optional, Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
-class MCPServer:
-    """Handles the MCP server process and communication"""
-    def __init__(self, allowed_dirs: list[str]):
-        self.allowed_dirs = allowed_dirs
-        self.process: Optional[subprocess.Popen] = None
-        self.request_id = 0
-        self._response_queue = queue.Queue()
-        self._lock = threading.Lock()
-        self._server_ready = threading.Event()
-        
-    def _find_executable(self, name: str) -> Optional[str]:
-        """Find an executable in PATH or common locations"""
-        if os.name == 'nt':
-            # Add .cmd extension for Windows npm executables
-            names = [f"{name}.exe", f"{name}.cmd", name]
-            
-            # Get npm prefix
-            try:
-                npm_prefix = subprocess.check_output(['npm', 'config', 'get', 'prefix'], text=True).strip()
-                logger.info(f"NPM prefix: {npm_prefix}")
-            except Exception as e:
-                logger.warning(f"Could not get npm prefix: {e}")
-                npm_prefix = None
-            
-            # Common locations
-            locations = [
-                os.path.expanduser('~\\scoop\\shims'),
-                os.path.expanduser('~\\scoop\\apps\\nodejs\\current'),
-                os.path.expanduser('~\\scoop\\persist\\nodejs\\bin'),
-                os.path.expanduser('~\\AppData\\Roaming\\npm'),
-                'C:\\Program Files\\nodejs',
-                os.path.expanduser('~\\AppData\\Local\\npm'),
-                os.path.expanduser('~\\AppData\\Local\\npm-cache'),
-            ]
-            
-            # Add npm prefix locations if available
-            if npm_prefix:
-                locations.extend([
-                    npm_prefix,
-                    os.path.join(npm_prefix, 'node_modules', '.bin'),
-                    os.path.join(npm_prefix, 'node_modules', 'npm', 'bin')
-                ])
-            
-            # Check PATH first
-            for exe_name in names:
-                exe_path = shutil.which(exe_name)
-                if exe_path:
-                    logger.info(f"Found {exe_name} in PATH: {exe_path}")
-                    return exe_path
-            
-            # Check all possible locations
-            for location in locations:
-                for exe_name in names:
-                    path = os.path.join(location, exe_name)
-                    logger.debug(f"Checking for {exe_name} in {location}")
-                    if os.path.isfile(path):
-                        logger.info(f"Found {exe_name} at: {path}")
-                        return path
-            
-            logger.error(f"Could not find {name} in any location. Searched in: {', '.join(locations)}")
-            return None
-        else:
-            return shutil.which(name)
-            
-    def start(self) -> bool:
-        """Start the MCP server process"""
-        if self.process and self.process.poll() is None:
-            return True
-            
-        # Set up environment with proper paths and encoding
-        env = os.environ.copy()
-        env['PYTHONIOENCODING'] = 'utf-8'
-        env['NODE_NO_WARNINGS'] = '1'
-        
-        if os.name == 'nt':
-            env['PYTHONLEGACYWINDOWSSTDIO'] = '0'
-            
-            # Find node executable
-            node_exe = self._find_executable('node')
-            if not node_exe:
-                logger.error("Could not find node executable")
-                return False
-            
-            # Create a simple Node.js script for MCP server
-            script_content = """
+# Optional fast JSON codec: orjson consumes and produces bytes directly,
+# which pairs with the binary pipes below (no str round trip per message).
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+    _json_loads = json.loads
+
+# Environment for spawned server processes, built once: copying os.environ
+# allocates a full dict of every variable, so don't redo it per start().
+_CHILD_ENV = dict(os.environ)
+_CHILD_ENV['PYTHONIOENCODING'] = 'utf-8'
+_CHILD_ENV['NODE_NO_WARNINGS'] = '1'
+if os.name == 'nt':
+    _CHILD_ENV['PYTHONLEGACYWINDOWSSTDIO'] = '0'
+
+# Node.js script implementing the filesystem MCP server. Hoisted to module
+# scope and written to a content-addressed file in the temp directory, so a
+# warm start() skips the disk write entirely and concurrent processes can
+# never clobber each other's copy mid-read.
+_SERVER_SCRIPT = """
 const fs = require('fs').promises;
 const path = require('path');
 const readline = require('readline');
@@ -134,13 +81,13 @@ rl.on('line', async (line) => {
     try {
         const request = JSON.parse(line);
         console.error(`Parsed request:`, request);
-        
+
         // Handle ping request
         if (request.method === 'ping') {
             console.log(JSON.stringify({ id: request.id, type: 'response', result: { success: true } }));
             return;
         }
-        
+
         // Handle filesystem requests
         if (request.type === 'request' && request.tool === 'write_file') {
             try {
@@ -177,54 +124,228 @@ rl.on('line', async (line) => {
 process.on('SIGINT', () => process.exit(0));
 process.on('SIGTERM', () => process.exit(0));
 """
-            
-            # Write the script to a temporary file
-            script_path = os.path.join(os.getcwd(), 'mcp_server.js')
-            with open(script_path, 'w') as f:
-                f.write(script_content)
-                
-            # Run the server directly with node
-            cmd = [
-                node_exe,
-                script_path
+
+_SERVER_SCRIPT_BYTES = _SERVER_SCRIPT.encode('utf-8')
+_SERVER_SCRIPT_SHA = hashlib.blake2b(_SERVER_SCRIPT_BYTES, digest_size=16).hexdigest()
+
+def _ensure_server_script() -> str:
+    """Return the path to the on-disk server script, writing it only once.
+
+    The filename embeds the script hash, so a stale file from an older
+    version can never be picked up and the warm path is a single stat.
+    """
+    script_path = os.path.join(tempfile.gettempdir(), f'mcp_server.{_SERVER_SCRIPT_SHA}.js')
+    if not os.path.exists(script_path):
+        tmp_path = f'{script_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_SERVER_SCRIPT_BYTES)
+        os.replace(tmp_path, script_path)
+    return script_path
+
+# Single scan per output line instead of three substring checks with their
+# own str.lower() copies; the matched group tells us how to classify.
+_LOG_CLASSIFY = re.compile(r'(?i)(running on stdio|error:|warning:)')
+
+# The ping payload never changes; serialize it once instead of building and
+# dumping the same dict on every connection test
+_PING_PAYLOAD = _json_dumps({"id": "test-connection", "method": "ping", "params": {}}) + b'\n'
+
+@functools.lru_cache(maxsize=1)
+def _npm_prefix() -> Optional[str]:
+    """Resolve the npm global prefix once; spawning npm is expensive."""
+    try:
+        prefix = subprocess.check_output(['npm', 'config', 'get', 'prefix'], text=True).strip()
+        logger.info(f"NPM prefix: {prefix}")
+        return prefix
+    except Exception as e:
+        logger.warning(f"Could not get npm prefix: {e}")
+        return None
+
+class MCPServer:
+    """Handles the MCP server process and communication"""
+
+    # One selector thread services the pipes of every living instance
+    # (POSIX), so thread count stays flat no matter how many servers are
+    # started or restarted. Lazily created on first registration.
+    _DISPATCH_SEL: Optional[selectors.DefaultSelector] = None
+    _DISPATCH_LOCK = threading.Lock()
+
+    def __init__(self, allowed_dirs: list[str]):
+        # Normalize once; start() reuses the vetted tuple on every restart
+        self.allowed_dirs = tuple(os.path.normpath(dir_path) for dir_path in allowed_dirs)
+        self._dirs_ensured = False
+        self.process: Optional[subprocess.Popen] = None
+        self._id_gen = itertools.count(1)
+        self._server_ready = threading.Event()
+        # Outbound requests as serialized bytes; a single writer thread owns
+        # stdin, coalescing pending payloads into one write+flush
+        self._tx_q: queue.SimpleQueue = queue.SimpleQueue()
+        # In-flight requests indexed by id: request_id -> (Event, [response]).
+        # The monitor thread fills the slot and sets the event, so each
+        # caller gets exactly its own response with no queue scanning.
+        self._pending: Dict[str, tuple] = {}
+        self._pending_lock = threading.Lock()
+        self._read_bufs: Dict[int, bytes] = {}
+        self._registered_fds: List[int] = []
+        
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _find_executable(name: str) -> Optional[str]:
+        """Find an executable in PATH or common locations.
+
+        Results are memoized for the process lifetime: the Windows branch
+        walks a dozen filesystem locations and may spawn npm, which would
+        otherwise be repeated on every server (re)start.
+        """
+        if os.name == 'nt':
+            # Add .cmd extension for Windows npm executables
+            names = [f"{name}.exe", f"{name}.cmd", name]
+
+            # Check PATH first: in the common case this resolves instantly
+            # and we never have to spawn npm for its prefix at all
+            for exe_name in names:
+                exe_path = shutil.which(exe_name)
+                if exe_path:
+                    logger.info(f"Found {exe_name} in PATH: {exe_path}")
+                    return exe_path
+
+            # Get npm prefix (memoized; spawns npm at most once per process)
+            npm_prefix = _npm_prefix()
+
+            # Common locations
+            locations = [
+                os.path.expanduser('~\\scoop\\shims'),
+                os.path.expanduser('~\\scoop\\apps\\nodejs\\current'),
+                os.path.expanduser('~\\scoop\\persist\\nodejs\\bin'),
+                os.path.expanduser('~\\AppData\\Roaming\\npm'),
+                'C:\\Program Files\\nodejs',
+                os.path.expanduser('~\\AppData\\Local\\npm'),
+                os.path.expanduser('~\\AppData\\Local\\npm-cache'),
             ]
+            
+            # Add npm prefix locations if available
+            if npm_prefix:
+                locations.extend([
+                    npm_prefix,
+                    os.path.join(npm_prefix, 'node_modules', '.bin'),
+                    os.path.join(npm_prefix, 'node_modules', 'npm', 'bin')
+                ])
+            
+            # Check all possible locations with one directory read each
+            # instead of len(names) isfile() stats per location; a missing
+            # directory short-circuits on the scandir open
+            names_set = {exe_name.lower() for exe_name in names}
+            for location in locations:
+                logger.debug("Scanning %s", location)
+                try:
+                    with os.scandir(location) as entries:
+                        for entry in entries:
+                            if entry.name.lower() in names_set and entry.is_file():
+                                logger.info(f"Found {entry.name} at: {entry.path}")
+                                return entry.path
+                except OSError:
+                    continue
+            
+            logger.error(f"Could not find {name} in any location. Searched in: {', '.join(locations)}")
+            return None
         else:
-            cmd = [
-                'node',
-                script_path
-            ]
-        
-        # Add allowed directories
-        cmd.extend([os.path.normpath(dir_path) for dir_path in self.allowed_dirs])
+            return shutil.which(name)
+
+    @classmethod
+    def invalidate_exe_cache(cls) -> None:
+        """Flush memoized executable lookups (e.g. after a config reload)."""
+        cls._find_executable.cache_clear()
+        _npm_prefix.cache_clear()
+
+    _STDERR_LOG = 'mcp_server_stderr.log'
+    _STDERR_LOG_MAX_BYTES = 10 * 1024 * 1024
+
+    def _open_stderr_log(self) -> Optional[int]:
+        """Open the append-mode fd the child's stderr is redirected to.
+
+        The file is truncated when it has grown past the size cap. Returns
+        None if it cannot be opened, in which case the caller falls back to
+        a monitored pipe.
+        """
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+        try:
+            if os.path.getsize(self._STDERR_LOG) > self._STDERR_LOG_MAX_BYTES:
+                flags |= os.O_TRUNC
+        except OSError:
+            pass
+        try:
+            return os.open(self._STDERR_LOG, flags, 0o600)
+        except OSError as e:
+            logger.warning(f"Could not open stderr log {self._STDERR_LOG}: {e}")
+            return None
+
+    def start(self) -> bool:
+        """Start the MCP server process"""
+        if self.process and self.process.poll() is None:
+            return True
+            
+        # Environment with proper paths and encoding (prebuilt at import)
+        env = _CHILD_ENV
+
+        script_path = _ensure_server_script()
+
+        # Resolve node to an absolute path on every platform: besides giving
+        # a clear error when it's missing, CPython's posix_spawn fast path
+        # requires an executable with a directory component (bare 'node'
+        # would force the fork+exec route).
+        node_exe = self._find_executable('node')
+        if not node_exe:
+            logger.error("Could not find node executable")
+            return False
+        cmd = [node_exe, script_path]
+
+        # Add allowed directories (already normalized in __init__)
+        cmd.extend(self.allowed_dirs)
             
         logger.info(f"Starting server with command: {' '.join(cmd)}")
         logger.info(f"Environment PATH: {env.get('PATH')}")
         logger.info(f"Working directory: {os.getcwd()}")
         
         try:
-            # Create data directories if they don't exist
-            for dir_path in self.allowed_dirs:
-                try:
-                    os.makedirs(dir_path, exist_ok=True)
-                    logger.info(f"Ensured directory exists: {dir_path}")
-                except PermissionError as e:
-                    logger.error(f"Permission error creating directory {dir_path}: {e}")
-                    return False
-                except Exception as e:
-                    logger.error(f"Error creating directory {dir_path}: {e}")
-                    return False
+            # Create data directories if they don't exist (once per instance;
+            # repeating the makedirs/stat walk on every restart is wasted I/O)
+            if not self._dirs_ensured:
+                for dir_path in self.allowed_dirs:
+                    try:
+                        os.makedirs(dir_path, exist_ok=True)
+                        logger.info(f"Ensured directory exists: {dir_path}")
+                    except PermissionError as e:
+                        logger.error(f"Permission error creating directory {dir_path}: {e}")
+                        return False
+                    except Exception as e:
+                        logger.error(f"Error creating directory {dir_path}: {e}")
+                        return False
+                self._dirs_ensured = True
             
-            # Start server process with proper buffering
+            # Start server process with proper buffering. stderr carries only
+            # diagnostic chatter (responses and the ready banner are on
+            # stdout), so it goes straight to a bounded log file: no Python
+            # consumer thread, and a slow reader can never back-pressure the
+            # child into blocking on its stderr writes.
+            stderr_fd = self._open_stderr_log()
             try:
                 self.process = subprocess.Popen(
                     cmd,
                     stdin=subprocess.PIPE,
                     stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,  # Use text mode
-                    bufsize=1,  # Line buffered
-                    env=env,
-                    cwd=os.getcwd()
+                    stderr=stderr_fd if stderr_fd is not None else subprocess.PIPE,
+                    # Binary pipes: JSON is serialized/parsed as bytes, so the
+                    # TextIOWrapper encode/decode layer would be pure overhead
+                    bufsize=65536,  # Block-buffered; fewer read() syscalls per line
+                    # close_fds=False on POSIX, together with the absolute
+                    # node path above and no cwd override, satisfies all of
+                    # CPython's preconditions for the posix_spawn fast path
+                    # (fork+exec would copy the interpreter's page tables per
+                    # spawn). Python-created fds are CLOEXEC by default, so
+                    # nothing of the parent's leaks into the child beyond the
+                    # stdio handles we pass explicitly.
+                    close_fds=(os.name == 'nt'),
+                    env=env
                 )
             except PermissionError as e:
                 logger.error(f"Permission error starting server: {e}")
@@ -232,47 +353,28 @@ process.on('SIGTERM', () => process.exit(0));
             except Exception as e:
                 logger.error(f"Error starting server: {e}")
                 return False
-                
+            finally:
+                if stderr_fd is not None:
+                    os.close(stderr_fd)  # Child holds its own copy
+
             logger.info(f"Server process started with PID: {self.process.pid}")
             
-            # Start output monitoring threads
-            def monitor_output(pipe, is_stderr=False):
-                try:
-                    for line in pipe:
-                        line = line.strip()
-                        if not line:
-                            continue
-                            
-                        if is_stderr:
-                            logger.error(f"Server stderr: {line}")
-                        else:
-                            logger.info(f"Server stdout: {line}")
-                            
-                        # Consider the server ready when it outputs the "running on stdio" message
-                        if "running on stdio" in line.lower():
-                            logger.info("Server indicated ready state")
-                            self._server_ready.set()
-                            
-                        try:
-                            # Try to parse as JSON
-                            data = json.loads(line)
-                            if isinstance(data, dict):
-                                if data.get('id') is not None:
-                                    self._response_queue.put(data)
-                        except json.JSONDecodeError:
-                            # Not JSON, treat as regular output
-                            if "Error:" in line or "error:" in line.lower():
-                                logger.error(f"Server error: {line}")
-                            elif "Warning:" in line or "warning:" in line.lower():
-                                logger.warning(f"Server warning: {line}")
-                            else:
-                                logger.debug(f"Server output: {line}")
-                except Exception as e:
-                    logger.error(f"Error monitoring {'stderr' if is_stderr else 'stdout'}: {e}")
-                    
-            threading.Thread(target=monitor_output, args=(self.process.stdout,), daemon=True).start()
-            threading.Thread(target=monitor_output, args=(self.process.stderr, True), daemon=True).start()
-            
+            # Start output monitoring. On POSIX the piped streams join the
+            # class-wide dispatcher thread; on Windows selectors can't poll
+            # pipes, so fall back to one blocking reader thread per pipe.
+            if os.name == 'nt':
+                threading.Thread(target=self._monitor_pipe_blocking,
+                                 args=(self.process.stdout, False), daemon=True).start()
+                if self.process.stderr is not None:
+                    threading.Thread(target=self._monitor_pipe_blocking,
+                                     args=(self.process.stderr, True), daemon=True).start()
+            else:
+                self._register_pipes()
+
+            # Fresh transmit queue per process; the writer thread owns stdin
+            self._tx_q = queue.SimpleQueue()
+            threading.Thread(target=self._writer_loop, daemon=True).start()
+
             # Wait for server to be ready
             try:
                 ready = self._server_ready.wait(timeout=30)  # 30 second timeout
@@ -300,15 +402,204 @@ process.on('SIGTERM', () => process.exit(0));
                 self.stop()
             return False
     
+    def _handle_output_line(self, raw: bytes, is_stderr: bool = False) -> None:
+        """Classify and dispatch one line of server output."""
+        # Lines arrive newline-stripped from the readers; a trailing \r from
+        # CRLF output is the only whitespace to shave, and that is a single
+        # byte check versus strip()'s two-sided scan plus copy
+        if raw.endswith(b'\r'):
+            raw = raw[:-1]
+        if not raw:
+            return
+        line = raw.decode('utf-8', errors='replace')
+
+        if is_stderr:
+            logger.error("Server stderr: %s", line)
+        else:
+            logger.info("Server stdout: %s", line)
+
+        match = _LOG_CLASSIFY.search(line)
+        tag = match.group(1).lower() if match else None
+
+        # Consider the server ready when it outputs the "running on stdio" message
+        if tag == 'running on stdio':
+            logger.info("Server indicated ready state")
+            self._server_ready.set()
+
+        # One-byte gate: only lines that can be JSON pay for a parse attempt,
+        # so plain log text never goes through raise-and-catch
+        if raw[:1] in (b'{', b'['):
+            try:
+                # Parse the raw bytes; no second decode pass
+                data = _json_loads(raw)
+            except ValueError:
+                pass
+            else:
+                if isinstance(data, dict):
+                    response_id = data.get('id')
+                    if response_id is not None:
+                        with self._pending_lock:
+                            entry = self._pending.pop(response_id, None)
+                        if entry is not None:
+                            entry[1][0] = data
+                            entry[0].set()
+                        else:
+                            # Nobody is waiting (e.g. a reply landing after
+                            # its caller timed out) — drop it rather than
+                            # let it poison a later request
+                            logger.debug("Dropping unmatched response id: %s", response_id)
+                return
+
+        # Not JSON, treat as regular output
+        if tag == 'error:':
+            logger.error("Server error: %s", line)
+        elif tag == 'warning:':
+            logger.warning("Server warning: %s", line)
+        else:
+            logger.debug("Server output: %s", line)
+
+    def _writer_loop(self) -> None:
+        """Drain the transmit queue onto the server's stdin.
+
+        The writer thread is the only stdin user, so callers need no lock;
+        any payloads queued while a write was in progress are coalesced
+        into the next single write. Writing the raw fd with os.write skips
+        the BufferedWriter copy and needs no flush. A None payload shuts
+        the thread down.
+        """
+        stdin_fd = self.process.stdin.fileno()
+        while True:
+            payload = self._tx_q.get()
+            if payload is None:
+                return
+            buf = bytearray(payload)
+            stopping = False
+            try:
+                while True:
+                    nxt = self._tx_q.get_nowait()
+                    if nxt is None:
+                        stopping = True
+                        break
+                    buf += nxt
+            except queue.Empty:
+                pass
+            try:
+                view = memoryview(buf)
+                while view:
+                    written = os.write(stdin_fd, view)
+                    view = view[written:]
+            except OSError as e:
+                logger.error(f"Error writing to server stdin: {e}")
+                return
+            if stopping:
+                return
+
+    def _monitor_pipe_blocking(self, pipe, is_stderr: bool) -> None:
+        """Drain one pipe with blocking reads (Windows fallback).
+
+        Reads in large chunks and splits on newlines in user space, the
+        same strategy as the selector loop, instead of paying the per-line
+        iterator bookkeeping of `for line in pipe`.
+        """
+        buf = b''
+        try:
+            while True:
+                chunk = pipe.read1(65536)
+                if not chunk:
+                    break
+                buf += chunk
+                *lines, buf = buf.split(b'\n')
+                for raw in lines:
+                    self._handle_output_line(raw, is_stderr)
+            if buf:
+                self._handle_output_line(buf, is_stderr)
+        except Exception as e:
+            logger.error(f"Error monitoring {'stderr' if is_stderr else 'stdout'}: {e}")
+
+    @classmethod
+    def _ensure_dispatcher(cls) -> selectors.DefaultSelector:
+        """Lazily start the shared pipe-dispatch thread (POSIX only)."""
+        with cls._DISPATCH_LOCK:
+            if cls._DISPATCH_SEL is None:
+                cls._DISPATCH_SEL = selectors.DefaultSelector()
+                threading.Thread(target=cls._dispatch_loop, daemon=True).start()
+            return cls._DISPATCH_SEL
+
+    @classmethod
+    def _dispatch_loop(cls) -> None:
+        """Service every registered pipe fd from one selector thread."""
+        sel = cls._DISPATCH_SEL
+        while True:
+            try:
+                for key, _ in sel.select(timeout=0.5):
+                    instance, is_stderr = key.data
+                    instance._service_fd(key.fd, is_stderr)
+            except Exception as e:
+                logger.error(f"Error monitoring server output: {e}")
+
+    def _register_pipes(self) -> None:
+        """Attach this instance's pipes to the shared dispatcher."""
+        sel = self._ensure_dispatcher()
+        pipes = [(self.process.stdout, False)]
+        if self.process.stderr is not None:
+            pipes.append((self.process.stderr, True))
+        for pipe, is_stderr in pipes:
+            fd = pipe.fileno()
+            os.set_blocking(fd, False)
+            self._read_bufs[fd] = b''
+            self._registered_fds.append(fd)
+            sel.register(fd, selectors.EVENT_READ, (self, is_stderr))
+
+    def _unregister_fd(self, fd: int) -> None:
+        try:
+            type(self)._DISPATCH_SEL.unregister(fd)
+        except (AttributeError, KeyError, ValueError):
+            pass
+        self._read_bufs.pop(fd, None)
+        if fd in self._registered_fds:
+            self._registered_fds.remove(fd)
+
+    def _service_fd(self, fd: int, is_stderr: bool) -> None:
+        """Drain one readable fd: chunked read, user-space line split."""
+        try:
+            chunk = os.read(fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b''
+        if not chunk:
+            # EOF: flush any partial trailing line, stop watching
+            tail = self._read_bufs.get(fd, b'')
+            if tail:
+                self._handle_output_line(tail, is_stderr)
+            self._unregister_fd(fd)
+            return
+        buf = self._read_bufs[fd] + chunk
+        *lines, self._read_bufs[fd] = buf.split(b'\n')
+        for raw in lines:
+            self._handle_output_line(raw, is_stderr)
+
     def stop(self) -> None:
         """Stop the MCP server process"""
-        if self.process:
+        process = self.process
+        if process:
             try:
-                self.process.terminate()
-                try:
-                    self.process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    self.process.kill()
+                self._tx_q.put(None)  # Shut down the writer thread
+                for fd in list(self._registered_fds):
+                    self._unregister_fd(fd)
+                if process.poll() is None:
+                    # Close stdin first: the Node script exits on stdin EOF,
+                    # which beats SIGTERM delivery plus handler dispatch
+                    try:
+                        process.stdin.close()
+                    except OSError:
+                        pass
+                    process.terminate()
+                    try:
+                        process.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+                        process.wait()
                 logger.info("Server stopped")
             except Exception as e:
                 logger.error(f"Error stopping server: {e}")
@@ -321,16 +612,10 @@ process.on('SIGTERM', () => process.exit(0));
             logger.error("Server is not running")
             return None
 
-        # Clear any pending responses
-        while not self._response_queue.empty():
-            try:
-                self._response_queue.get_nowait()
-            except queue.Empty:
-                break
+        # Monotonic counter: timestamp-based ids collide when two requests
+        # land in the same millisecond, and next() is a single C increment
+        request_id = str(next(self._id_gen))
 
-        # Use timestamp as request ID
-        request_id = str(int(time.time() * 1000))
-        
         # Prepare request
         request = {
             "type": "request",
@@ -338,44 +623,46 @@ process.on('SIGTERM', () => process.exit(0));
             "tool": tool_name
         }
         request.update(params)  # Add all params to request
-        
+
+        # Register before sending so the monitor thread can't race us
+        event = threading.Event()
+        slot = [None]
+        with self._pending_lock:
+            self._pending[request_id] = (event, slot)
+
         try:
-            # Send request
-            request_str = json.dumps(request) + "\n"
-            logger.info(f"Sending request: {request}")
-            
-            with self._lock:
-                self.process.stdin.write(request_str)
-                self.process.stdin.flush()
-            
-            # Wait for response
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                try:
-                    response = self._response_queue.get(timeout=1.0)
-                    logger.info(f"Got response: {response}")
-                    
-                    # Accept response if it matches our request
-                    if isinstance(response, dict):
-                        if response.get("type") == "error":
-                            logger.error(f"Server error: {response.get('error')}")
-                            return None
-                            
-                        if response.get("type") == "response":
-                            return response.get("result")
-                            
-                except queue.Empty:
-                    if self.process.poll() is not None:
-                        logger.error(f"Server process terminated. Exit code: {self.process.poll()}")
+            # Hand the serialized request to the writer thread
+            logger.info("Sending request: %s", request)
+            self._tx_q.put(_json_dumps(request) + b'\n')
+
+            # Wait against a monotonic deadline; the 2s cap on each wait
+            # only exists so server death is still noticed while we block
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.error(f"Timeout waiting for response")
+                    return None
+
+                if event.wait(timeout=min(2.0, remaining)):
+                    response = slot[0]
+                    logger.info("Got response: %s", response)
+
+                    if response.get("type") == "error":
+                        logger.error(f"Server error: {response.get('error')}")
                         return None
-                    continue
-            
-            logger.error(f"Timeout waiting for response")
-            return None
-            
+                    return response.get("result")
+
+                if self.process.poll() is not None:
+                    logger.error(f"Server process terminated. Exit code: {self.process.poll()}")
+                    return None
+
         except Exception as e:
             logger.error(f"Error executing {tool_name}: {e}")
             return None
+        finally:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
             
     def test_connection(self) -> bool:
         """Test if the server is responsive by sending a ping request."""
@@ -387,40 +674,33 @@ process.on('SIGTERM', () => process.exit(0));
                 logger.error("Server process is not running")
                 return False
                 
-            # Clear any pending responses
-            while not self._response_queue.empty():
-                self._response_queue.get_nowait()
-                
-            # Send test request
-            test_request = {
-                "id": "test-connection",
-                "method": "ping",
-                "params": {}
-            }
-            
-            logger.debug(f"Sending test request: {test_request}")
-            self.process.stdin.write(json.dumps(test_request) + "\n")
-            self.process.stdin.flush()
-            
-            # Wait for response with timeout
+            event = threading.Event()
+            slot = [None]
+            with self._pending_lock:
+                self._pending["test-connection"] = (event, slot)
+
             try:
-                response = self._response_queue.get(timeout=10)
-                logger.debug(f"Received test response: {response}")
-                
-                if response.get("id") == "test-connection":
-                    if "error" in response:
-                        logger.error(f"Server returned error: {response['error']}")
-                        return False
-                    logger.info("Server connection test successful")
-                    return True
-                else:
-                    logger.warning(f"Unexpected response ID: {response.get('id')}")
+                logger.debug("Sending test request")
+                self._tx_q.put(_PING_PAYLOAD)
+
+                # Wait for the matching response with timeout
+                if not event.wait(timeout=10):
+                    logger.error("Timeout waiting for test response")
                     return False
-                    
-            except queue.Empty:
-                logger.error("Timeout waiting for test response")
-                return False
-                
+
+                response = slot[0]
+                logger.debug("Received test response: %s", response)
+
+                if "error" in response:
+                    logger.error(f"Server returned error: {response['error']}")
+                    return False
+                logger.info("Server connection test successful")
+                return True
+            finally:
+                with self._pending_lock:
+                    self._pending.pop("test-connection", None)
+
+
         except Exception as e:
             logger.error(f"Error testing connection: {e}")
             return False